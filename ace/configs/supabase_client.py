@@ -0,0 +1,44 @@
+"""
+Shared Supabase client for ACE project.
+
+Every script in a process reuses one client, so all requests share the same
+pooled keep-alive HTTP connections instead of each module opening its own.
+The underlying httpx session is left as postgrest-py builds it: it already
+uses HTTP/2 (httpx[http2], with h2 pinned in uv.lock).
+
+Usage:
+    from configs.supabase_client import get_supabase_client
+    supabase = get_supabase_client()
+"""
+from functools import lru_cache
+
+try:
+    from config import config
+except ImportError:
+    from .config import config
+
+# Make Supabase optional
+try:
+    from supabase import create_client
+    SUPABASE_AVAILABLE = True
+except ImportError:
+    SUPABASE_AVAILABLE = False
+
+
+@lru_cache(maxsize=None)
+def get_supabase_client():
+    """
+    Get the process-wide Supabase client, creating it on first use
+
+    Returns:
+        Client: Supabase client built from SUPABASE_URL and SUPABASE_KEY
+
+    Raises:
+        ImportError: If the supabase package is not installed
+        ValueError: If SUPABASE_URL or SUPABASE_KEY is not set
+    """
+    if not SUPABASE_AVAILABLE:
+        raise ImportError("supabase package not installed. Install with: pip install supabase")
+
+    config.validate_supabase()
+    return create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
@@ -15,19 +15,13 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from configs.logging_config import setup_logging
 logger = setup_logging(__name__)
 
-# Make Supabase optional
-try:
-    from supabase import create_client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
-
 # Add configs to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'configs'))
 
 from configs.domain_config import get_domain_config_for_model
 from configs.model_providers import get_provider_for_model
 from configs.config import config
+from configs.supabase_client import SUPABASE_AVAILABLE, get_supabase_client
 
 # Supabase client will be created in clear_supabase_data() after validation
 
@@ -46,7 +40,9 @@ def clear_supabase_data(domain, model_name, run_number):
     task_table = domain_config['task_table']
     criteria_table = domain_config['criteria_table']
 
-    supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+    from supabase_reader import iter_keyset_pages
+
+    supabase = get_supabase_client()
 
     logger.info('Clearing Supabase tables...')
 
@@ -67,17 +63,8 @@ def clear_supabase_data(domain, model_name, run_number):
 
     # Get task IDs
     task_ids = []
-    page_size = 1000
-    offset = 0
-
-    while True:
-        result = supabase.table(task_table).select('"Task ID"').range(offset, offset + page_size - 1).execute()
-        if not result.data:
-            break
-        task_ids.extend([row['Task ID'] for row in result.data])
-        if len(result.data) < page_size:
-            break
-        offset += page_size
+    for page_rows in iter_keyset_pages(lambda: supabase.table(task_table).select('"Task ID"'), 'Task ID'):
+        task_ids.extend([row['Task ID'] for row in page_rows])
 
     logger.info(f'Found {len(task_ids)} tasks to clear')
 
@@ -111,17 +98,8 @@ def clear_supabase_data(domain, model_name, run_number):
 
     # Get criterion IDs
     criterion_ids = []
-    page_size = 1000
-    offset = 0
-
-    while True:
-        result = supabase.table(criteria_table).select('"Criterion ID"').range(offset, offset + page_size - 1).execute()
-        if not result.data:
-            break
-        criterion_ids.extend([row['Criterion ID'] for row in result.data])
-        if len(result.data) < page_size:
-            break
-        offset += page_size
+    for page_rows in iter_keyset_pages(lambda: supabase.table(criteria_table).select('"Criterion ID"'), 'Criterion ID'):
+        criterion_ids.extend([row['Criterion ID'] for row in page_rows])
 
     logger.info(f'Found {len(criterion_ids)} criteria to clear')
 
@@ -13,7 +13,6 @@ import json
 import os
 import sys
 from pathlib import Path
-from collections import defaultdict
 
 # Add project root to path FIRST
 script_dir = os.path.dirname(os.path.abspath(__file__))
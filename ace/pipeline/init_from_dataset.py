@@ -32,12 +32,13 @@ load_dotenv()
 from configs.logging_config import setup_logging
 from configs.domain_config import get_domain_config_for_model
 from configs.model_providers import MODEL_REGISTRY, get_provider_for_model
+from configs.supabase_client import get_supabase_client
 
 logger = setup_logging(__name__)
 
 # Supabase optional - disabled by default, use --supabase flag to enable
 try:
-    from supabase import create_client, Client
+    from supabase import Client
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
@@ -50,6 +51,12 @@ supabase = None
 AVAILABLE_DOMAINS = ['Shopping', 'Food', 'Gaming', 'DIY']
 AVAILABLE_MODELS = list(MODEL_REGISTRY.keys())
 
+# Max IDs per IN (...) filter - keeps PostgREST request URLs well under size limits
+EXISTENCE_CHECK_BATCH_SIZE = 1000
+
+# Rows per bulk insert/upsert request
+WRITE_BATCH_SIZE = 500
+
 
 def load_csv_data(csv_file, domain):
     """
@@ -77,14 +84,85 @@ def load_csv_data(csv_file, domain):
     return criteria
 
 
-def insert_criteria_to_table(criteria, domain, model, overwrite=False, dry_run=False):
+def fetch_existing_ids(table_name, id_column, ids):
+    """
+    Fetch which of the given IDs already exist in a Supabase table
+
+    Uses one IN (...) query per batch instead of one SELECT per ID.
+
+    Args:
+        table_name: Name of the table to check
+        id_column: Name of the ID column (e.g. 'Task ID')
+        ids: IDs to check
+
+    Returns:
+        set: IDs that already exist in the table
+    """
+    ids = list(ids)
+    existing_ids = set()
+
+    for start in range(0, len(ids), EXISTENCE_CHECK_BATCH_SIZE):
+        batch = ids[start:start + EXISTENCE_CHECK_BATCH_SIZE]
+        result = supabase.table(table_name).select(f'"{id_column}"').in_(f'"{id_column}"', batch).execute()
+        existing_ids.update(row[id_column] for row in result.data)
+
+    return existing_ids
+
+
+def write_rows_in_batches(table_name, rows, id_column, overwrite=False):
+    """
+    Insert or upsert rows into a Supabase table in batches
+
+    Sends WRITE_BATCH_SIZE rows per request. If a batch fails, its rows are
+    retried one at a time so a single bad row doesn't drop the whole batch.
+
+    Args:
+        table_name: Name of the table to write to
+        rows: List of row dicts
+        id_column: Primary key column (used as upsert conflict target)
+        overwrite: If True, use upsert. If False, use insert.
+
+    Returns:
+        tuple: (inserted, errors)
+    """
+    def write(payload):
+        if overwrite:
+            supabase.table(table_name).upsert(payload, on_conflict=id_column).execute()
+        else:
+            supabase.table(table_name).insert(payload).execute()
+
+    inserted = 0
+    errors = 0
+
+    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+        batch = rows[start:start + WRITE_BATCH_SIZE]
+        try:
+            write(batch)
+            inserted += len(batch)
+        except Exception as e:
+            logger.warning(f"Batch write to {table_name} failed ({e}), retrying {len(batch)} rows individually...")
+            for data in batch:
+                try:
+                    write(data)
+                    inserted += 1
+                except Exception as e:
+                    errors += 1
+                    if errors <= 3:  # Only show first few errors
+                        logger.error(f"Error on {id_column} {data.get(id_column, '?')}: {e}")
+
+        logger.debug(f"Progress: {inserted}/{len(rows)} rows written to {table_name}...")
+
+    return inserted, errors
+
+
+def insert_criteria_to_table(criteria, domain, criteria_table, overwrite=False, dry_run=False):
     """
     Insert criteria into Supabase criteria table
 
     Args:
         criteria: List of criteria dicts from CSV
         domain: Domain name
-        model: Model name
+        criteria_table: Name of the criteria table
         overwrite: If True, use upsert. If False, skip existing.
         dry_run: If True, don't actually insert
 
@@ -95,16 +173,24 @@ def insert_criteria_to_table(criteria, domain, model, overwrite=False, dry_run=F
         logger.info("Skipping criteria table insert (local files only)")
         return 0
 
-    config = get_domain_config_for_model(domain, model)
-    criteria_table = config['criteria_table']
-
     logger.info(f"Inserting into {criteria_table}...")
 
     if dry_run:
         logger.info(f"[DRY RUN] Would insert {len(criteria)} criteria")
         return len(criteria)
 
-    inserted = 0
+    # Check existing criteria up front (unless overwrite mode)
+    existing_ids = set()
+    if not overwrite:
+        criterion_ids = set()
+        for row in criteria:
+            try:
+                criterion_ids.add(int(row['Criterion ID']))
+            except (KeyError, TypeError, ValueError):
+                pass  # Counted as an error in the loop below
+        existing_ids = fetch_existing_ids(criteria_table, 'Criterion ID', criterion_ids)
+
+    rows = []
     skipped = 0
     errors = 0
 
@@ -116,12 +202,9 @@ def insert_criteria_to_table(criteria, domain, model, overwrite=False, dry_run=F
 
             criterion_id = int(row['Criterion ID'])
 
-            # Check if exists (unless overwrite mode)
-            if not overwrite:
-                existing = supabase.table(criteria_table).select('"Criterion ID"').eq('"Criterion ID"', criterion_id).execute()
-                if existing.data:
-                    skipped += 1
-                    continue
+            if criterion_id in existing_ids:
+                skipped += 1
+                continue
 
             # Prepare data (map CSV columns to DB columns)
             data = {
@@ -140,23 +223,17 @@ def insert_criteria_to_table(criteria, domain, model, overwrite=False, dry_run=F
             if domain == 'Shopping':
                 data["Shop vs. Product"] = row.get('Shop vs. Product', '')
 
-            # Insert or update
-            if overwrite:
-                supabase.table(criteria_table).upsert(data, on_conflict='Criterion ID').execute()
-            else:
-                supabase.table(criteria_table).insert(data).execute()
-
-            inserted += 1
-
-            # Progress updates
-            if inserted % 100 == 0:
-                logger.debug(f"Progress: {inserted}/{len(criteria)} criteria inserted...")
+            rows.append(data)
 
         except Exception as e:
             errors += 1
             if errors <= 3:  # Only show first few errors
                 logger.error(f"Error on criterion {row.get('Criterion ID', '?')}: {e}")
 
+    # Insert or update in batches
+    inserted, write_errors = write_rows_in_batches(criteria_table, rows, 'Criterion ID', overwrite)
+    errors += write_errors
+
     logger.info(f"Inserted: {inserted}, Skipped: {skipped}, Errors: {errors}")
     return inserted
 
@@ -239,14 +316,14 @@ def create_test_case_json_files(criteria, domain, model, runs=[1,2,3,4,5,6,7,8])
     return len(tasks_data)
 
 
-def insert_tasks_to_table(criteria, domain, model, overwrite=False, dry_run=False):
+def insert_tasks_to_table(criteria, domain, task_table, overwrite=False, dry_run=False):
     """
     Extract unique tasks from criteria and insert into task table
 
     Args:
         criteria: List of criteria dicts from CSV
         domain: Domain name
-        model: Model name
+        task_table: Name of the task table
         overwrite: If True, use upsert. If False, skip existing.
         dry_run: If True, don't actually insert
 
@@ -257,9 +334,6 @@ def insert_tasks_to_table(criteria, domain, model, overwrite=False, dry_run=Fals
         logger.info("Skipping task table insert (local files only)")
         return 0
 
-    config = get_domain_config_for_model(domain, model)
-    task_table = config['task_table']
-
     # Extract unique tasks
     tasks = {}
     for row in criteria:
@@ -281,43 +355,35 @@ def insert_tasks_to_table(criteria, domain, model, overwrite=False, dry_run=Fals
         logger.info(f"[DRY RUN] Would insert {len(tasks)} tasks")
         return len(tasks)
 
-    inserted = 0
+    # Check existing tasks up front (unless overwrite mode)
+    existing_ids = set()
+    if not overwrite:
+        existing_ids = fetch_existing_ids(task_table, 'Task ID', tasks.keys())
+
+    rows = []
     skipped = 0
-    errors = 0
 
     for task_id, task_data in sorted(tasks.items()):
-        try:
-            # Check if exists (unless overwrite mode)
-            if not overwrite:
-                existing = supabase.table(task_table).select('"Task ID"').eq('"Task ID"', task_id).execute()
-                if existing.data:
-                    skipped += 1
-                    continue
-
-            # Prepare data
-            data = {
-                "Task ID": task_id,
-                "Prompt": task_data['prompt'],
-                "Specified Prompt": task_data['specified_prompt'],
-                "Workflow": task_data['workflow']
-            }
+        if task_id in existing_ids:
+            skipped += 1
+            continue
 
-            # Add Shop vs. Product for Shopping domain only
-            if domain == 'Shopping' and task_data.get('shop_vs_product'):
-                data["Shop vs. Product"] = task_data['shop_vs_product']
+        # Prepare data
+        data = {
+            "Task ID": task_id,
+            "Prompt": task_data['prompt'],
+            "Specified Prompt": task_data['specified_prompt'],
+            "Workflow": task_data['workflow']
+        }
 
-            # Insert or update
-            if overwrite:
-                supabase.table(task_table).upsert(data, on_conflict='Task ID').execute()
-            else:
-                supabase.table(task_table).insert(data).execute()
+        # Add Shop vs. Product for Shopping domain only
+        if domain == 'Shopping' and task_data.get('shop_vs_product'):
+            data["Shop vs. Product"] = task_data['shop_vs_product']
 
-            inserted += 1
+        rows.append(data)
 
-        except Exception as e:
-            errors += 1
-            if errors <= 3:
-                logger.error(f"Error on task {task_id}: {e}")
+    # Insert or update in batches
+    inserted, errors = write_rows_in_batches(task_table, rows, 'Task ID', overwrite)
 
     logger.info(f"Inserted: {inserted}, Skipped: {skipped}, Errors: {errors}")
     return inserted
@@ -347,14 +413,17 @@ def initialize_domain_model(domain, model, overwrite=False, dry_run=False):
     logger.info(f"{'='*60}")
 
     try:
+        # Resolve table names once for this domain-model combination
+        config = get_domain_config_for_model(domain, model)
+
         # Load CSV data
         criteria = load_csv_data(csv_file, domain)
 
         # Insert criteria
-        criteria_count = insert_criteria_to_table(criteria, domain, model, overwrite, dry_run)
+        criteria_count = insert_criteria_to_table(criteria, domain, config['criteria_table'], overwrite, dry_run)
 
         # Insert tasks
-        task_count = insert_tasks_to_table(criteria, domain, model, overwrite, dry_run)
+        task_count = insert_tasks_to_table(criteria, domain, config['task_table'], overwrite, dry_run)
 
         # Create local test case JSON files
         if not dry_run:
@@ -429,7 +498,7 @@ Examples:
             logger.error("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
             sys.exit(1)
 
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase = get_supabase_client()
         logger.info("Supabase enabled")
 
     # Determine domains and models to process
@@ -33,7 +33,7 @@ logger = setup_logging(__name__)
 
 # Make Supabase optional
 try:
-    from supabase import create_client, Client
+    from supabase import Client
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
@@ -47,6 +47,7 @@ sys.path.insert(0, os.path.join(project_root, 'configs'))
 
 # Import from configs
 from configs.config import config
+from configs.supabase_client import get_supabase_client
 from configs.domain_config import get_domain_config_for_model
 from configs.model_providers import get_provider_for_model
 
@@ -435,7 +436,7 @@ def main():
         global USE_SUPABASE, supabase
         if config.has_supabase() and SUPABASE_AVAILABLE:
             USE_SUPABASE = True
-            supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+            supabase = get_supabase_client()
             print("--supabase flag: Enabling Supabase operations")
         else:
             print("⚠️  --supabase flag set but Supabase not available")
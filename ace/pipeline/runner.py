@@ -25,7 +25,7 @@ logger = setup_logging(__name__)
 
 # Make Supabase optional
 try:
-    from supabase import create_client, Client
+    from supabase import Client
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
@@ -33,6 +33,7 @@ except ImportError:
 
 # Load configuration
 from configs.config import config
+from configs.supabase_client import get_supabase_client
 
 # Supabase (optional - disabled by default, use --supabase flag to enable)
 USE_SUPABASE = False  # Default OFF - use --supabase flag to enable
@@ -445,6 +446,59 @@ def write_results_to_numbered_columns(scraped_file, autograder_file, domain, mod
         raise Exception(f"Failed to write task table after {MAX_RETRY_ATTEMPTS} attempts: {e}")
 
 
+def prefetch_test_cases(task_ids, domain, model_name, run_number):
+    """
+    Fetch missing 0_test_case.json files from Supabase before processing
+
+    All missing test cases are fetched with batched IN (...) queries and
+    grouped in memory, instead of one round-trip per task. Tasks that fail
+    here are retried by process_single_task_with_original_scripts.
+
+    Args:
+        task_ids: Task IDs to prefetch
+        domain: Domain name
+        model_name: Model name (e.g. 'gpt-5', 'gemini-2.5-pro')
+        run_number: Run number (1-8)
+
+    Returns:
+        int: Number of test case files written
+    """
+    from supabase_reader import get_test_cases
+
+    provider_name = get_provider_for_model(model_name)
+    criteria_table = get_domain_config_for_model(domain, model_name)['criteria_table']
+
+    # Only fetch test cases that don't exist locally yet
+    missing = {}
+    for task_id in task_ids:
+        results_dir = os.path.join(project_root, 'results', provider_name, model_name, domain, f'run_{run_number}', f'task_{task_id}')
+        test_case_file = os.path.join(results_dir, '0_test_case.json')
+        if not os.path.exists(test_case_file):
+            missing[task_id] = test_case_file
+
+    if not missing:
+        return 0
+
+    try:
+        test_cases = get_test_cases(list(missing), domain=domain, table_name=criteria_table)
+    except Exception as e:
+        logger.warning(f"Could not prefetch test cases ({e}), tasks will fetch their own")
+        return 0
+
+    written = 0
+    for task_id, test_case in test_cases.items():
+        test_case_file = missing.get(task_id)
+        if test_case_file is None:
+            continue
+
+        os.makedirs(os.path.dirname(test_case_file), exist_ok=True)
+        with open(test_case_file, 'w', encoding='utf-8') as f:
+            json.dump(test_case, f, indent=2, ensure_ascii=False)
+        written += 1
+
+    return written
+
+
 def get_pending_tasks_from_files(domain, model_name, run_number, force=False, skip_grading=False):
     """
     Get pending tasks from local filesystem (when Supabase not available)
@@ -467,6 +521,37 @@ def get_pending_tasks_from_files(domain, model_name, run_number, force=False, sk
     return get_pending_from_local(domain, model_name, run_number, force, skip_grading)
 
 
+def get_all_task_ids(criteria_table):
+    """
+    Get all unique task IDs from a criteria table
+
+    Uses the get_distinct_task_ids RPC (supabase-setup/create_functions.sql)
+    so Postgres returns one row per task. Falls back to paging through the
+    criteria rows if the function isn't installed.
+
+    Args:
+        criteria_table: Name of the criteria table
+
+    Returns:
+        list: Sorted task IDs
+    """
+    from supabase_reader import iter_keyset_pages
+
+    # IMPORTANT: Paginate to get ALL rows (default limit is 1000, RPCs included)
+    def fetch_all(build_query):
+        task_ids = set()
+        for page_rows in iter_keyset_pages(build_query, 'Task ID'):
+            task_ids.update(row['Task ID'] for row in page_rows)
+        return sorted(task_ids)
+
+    try:
+        return fetch_all(lambda: supabase.rpc('get_distinct_task_ids', {'criteria_table': criteria_table}))
+    except Exception as e:
+        logger.debug(f"get_distinct_task_ids RPC unavailable ({e}), paging criteria rows instead")
+
+    return fetch_all(lambda: supabase.table(criteria_table).select('"Task ID"'))
+
+
 def get_pending_tasks(domain, model_name, run_number, force=False, skip_grading=False):
     """
     Get tasks that need processing for a specific run
@@ -492,21 +577,7 @@ def get_pending_tasks(domain, model_name, run_number, force=False, skip_grading=
 
     # Get all unique task IDs from the criteria table (ACE table)
     # This is the source of truth for which tasks exist
-    # IMPORTANT: Paginate to get ALL rows (default limit is 1000)
-    all_rows = []
-    page_size = 1000
-    offset = 0
-
-    while True:
-        result = supabase.table(criteria_table).select('"Task ID"').range(offset, offset + page_size - 1).execute()
-        if not result.data:
-            break
-        all_rows.extend(result.data)
-        if len(result.data) < page_size:
-            break
-        offset += page_size
-
-    all_task_ids = sorted(list(set([row['Task ID'] for row in all_rows])))
+    all_task_ids = get_all_task_ids(criteria_table)
 
     # If force flag is set, return ALL tasks (ignore existing responses)
     if force:
@@ -547,7 +618,7 @@ def main():
         global USE_SUPABASE, supabase
         if config.has_supabase() and SUPABASE_AVAILABLE:
             USE_SUPABASE = True
-            supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+            supabase = get_supabase_client()
             logger.info("--supabase flag: Enabling Supabase writes")
         else:
             logger.warning("--supabase flag set but Supabase not available (missing credentials or package)")
@@ -599,6 +670,11 @@ def main():
             all_results[model_name] = {'success': 0, 'failed': 0, 'time': 0}
             continue
 
+        # Fetch all missing test cases in bulk before the per-task pipeline starts
+        if USE_SUPABASE:
+            prefetched = prefetch_test_cases(pending, args.domain, model_name, args.run)
+            logger.info(f"Prefetched {prefetched} test cases from Supabase")
+
         logger.info(f"Processing {len(pending)} tasks...")
 
         # Process in parallel
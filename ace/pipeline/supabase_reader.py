@@ -17,7 +17,7 @@ logger = setup_logging(__name__)
 
 # Make Supabase optional
 try:
-    from supabase import create_client, Client
+    from supabase import Client
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
@@ -28,13 +28,58 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'configs'))
 
 # Import from configs
 from configs.config import config
+from configs.supabase_client import get_supabase_client
 
 # Supabase (optional)
 if config.has_supabase() and SUPABASE_AVAILABLE:
-    supabase: Client = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+    supabase: Client = get_supabase_client()
 else:
     supabase = None
 
+# Max task IDs per IN (...) filter when fetching test cases in bulk
+TASK_ID_BATCH_SIZE = 1000
+
+# Rows per page - PostgREST caps responses at max_rows (1000 by default)
+SUPABASE_PAGE_SIZE = 1000
+
+
+def iter_keyset_pages(build_query, key_column, page_size=None):
+    """
+    Yield every page of a query using keyset pagination
+
+    Each page starts after the last key seen instead of at an OFFSET, so
+    Postgres never re-scans the rows it already returned. Rows with a NULL
+    key are skipped: Postgres sorts them last, and a page ending on one
+    would restart the scan from the beginning.
+
+    Args:
+        build_query: Callable returning a fresh query (select and filters applied)
+        key_column: Column to order and page by (e.g. 'Criterion ID')
+        page_size: Rows per page (default: SUPABASE_PAGE_SIZE)
+
+    Yields:
+        list: Rows of one page
+    """
+    page_size = page_size or SUPABASE_PAGE_SIZE
+    last_key = None
+
+    while True:
+        query = build_query().not_.is_(f'"{key_column}"', 'null').order(key_column).limit(page_size)
+        if last_key is not None:
+            query = query.gt(f'"{key_column}"', last_key)
+        page_rows = query.execute().data
+
+        if not page_rows:
+            return
+
+        yield page_rows
+
+        if len(page_rows) < page_size:
+            # Last page
+            return
+
+        last_key = page_rows[-1][key_column]
+
 
 def execute_supabase_query(query):
     """Execute SQL query via Supabase RPC"""
@@ -66,31 +111,16 @@ def parse_supabase_table(table_name='ACE TEST', exclude_types=None, criterion_ty
     try:
         # Query ALL rows from the table (paginate if needed for tables > 1000 rows)
         all_rows = []
-        page_size = 1000
-        offset = 0
-
-        while True:
-            response = supabase.table(table_name).select('*').order('Task ID').order('Criterion ID').range(offset, offset + page_size - 1).execute()
-            page_rows = response.data
-
-            if not page_rows:
-                break
-
+        for page_rows in iter_keyset_pages(lambda: supabase.table(table_name).select('*'), 'Criterion ID'):
             all_rows.extend(page_rows)
 
-            if len(page_rows) < page_size:
-                # Last page
-                break
-
-            offset += page_size
-
         rows = all_rows
-        print(f"🔍 Debug: Retrieved {len(rows) if rows else 0} rows from {table_name}")
+        logger.debug(f"Retrieved {len(rows) if rows else 0} rows from {table_name}")
 
         if not rows:
-            print(f"⚠️  No data found in {table_name} table")
-            print(f"   This might be due to Row Level Security (RLS) policies.")
-            print(f"   Check that the anon key has SELECT permissions on this table.")
+            logger.warning(f"No data found in {table_name} table")
+            logger.warning("   This might be due to Row Level Security (RLS) policies.")
+            logger.warning("   Check that the anon key has SELECT permissions on this table.")
             return {}
 
         test_cases = defaultdict(lambda: {'prompt': '', 'criteria': []})
@@ -129,12 +159,98 @@ def parse_supabase_table(table_name='ACE TEST', exclude_types=None, criterion_ty
         return dict(test_cases)
 
     except Exception as e:
-        print(f"❌ Error reading from Supabase table: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error reading from Supabase table: {e}")
         return {}
 
 
+def resolve_criteria_config(domain, table_name=None, exclude_types=None, model_name=None):
+    """
+    Resolve criteria table name and column settings for a domain
+
+    Args:
+        domain: Domain name ('Shopping', 'Food', 'Gaming', 'DIY')
+        table_name: Override domain's default ACE table
+        exclude_types: Override domain's default exclusions
+        model_name: Model name (required if table_name not provided)
+
+    Returns:
+        dict: {table_name, exclude_types, criterion_type_column, description_column}
+    """
+    from configs.domain_config import get_domain_config_for_model, DOMAIN_BASE_CONFIG
+
+    # Get config - if model_name is provided, use it; otherwise infer from domain base config
+    if model_name:
+        config = get_domain_config_for_model(domain, model_name)
+    else:
+        # Fallback to base config (for backward compatibility)
+        config = DOMAIN_BASE_CONFIG[domain].copy()
+        # If table_name not provided and no model_name, we can't proceed
+        if table_name is None:
+            raise ValueError("Either table_name or model_name must be provided")
+
+    return {
+        # Use domain defaults if not overridden
+        'table_name': table_name if table_name is not None else config['criteria_table'],
+        'exclude_types': exclude_types if exclude_types is not None else config.get('exclude_types', []),
+        'criterion_type_column': config['criterion_type_column'],
+        'description_column': config.get('description_column', 'Description')  # All tables use "Description"
+    }
+
+
+def build_test_case(task_id, rows, domain, exclude_types, criterion_type_column, description_column='Description'):
+    """
+    Build a test case dict from the criteria rows of one task
+
+    Args:
+        task_id: Task ID
+        rows: Criteria rows for this task (ordered by Criterion ID)
+        domain: Domain name
+        exclude_types: Criterion types to skip
+        criterion_type_column: Name of the criterion type column
+        description_column: Name of the description column
+
+    Returns:
+        dict: {task_id, test_id, prompt, criteria, domain}
+    """
+    # Extract prompt (use Specified Prompt if available, fallback to Prompt)
+    prompt = rows[0].get('Specified Prompt') or rows[0]['Prompt']
+    prompt = prompt.strip()
+
+    # Build criteria list
+    criteria = []
+    for row in rows:
+        criterion_type_raw = row.get(criterion_type_column)
+
+        # Skip rows with NULL criterion type
+        if criterion_type_raw is None:
+            continue
+
+        criterion_type = criterion_type_raw.strip()
+
+        # Skip excluded criterion types
+        if criterion_type in exclude_types:
+            continue
+
+        # Add criterion with hurdle tag
+        hurdle_tag = row.get('Hurdle Tag', 'Not')
+        criteria.append({
+            'criterion_id': int(row['Criterion ID']),
+            'id': len(criteria) + 1,
+            'description': row[description_column].strip(),  # Use domain-specific column name
+            'type': criterion_type,
+            'hurdle_tag': hurdle_tag,
+            'grounded_status': row['Criterion Grounding Check']  # Read from database column
+        })
+
+    return {
+        'task_id': task_id,
+        'test_id': f"task_{task_id}",
+        'prompt': prompt,
+        'criteria': criteria,
+        'domain': domain
+    }
+
+
 def get_test_case(task_id, table_name=None, exclude_types=None, domain='Shopping', model_name=None, run_number=1):
     """
     Get a specific test case by task ID
@@ -160,26 +276,8 @@ def get_test_case(task_id, table_name=None, exclude_types=None, domain='Shopping
         return get_local_test_case(task_id, domain, model_name, run_number)
 
     # Supabase path
-    from configs.domain_config import get_domain_config_for_model, DOMAIN_BASE_CONFIG
-
-    # Get config - if model_name is provided, use it; otherwise infer from domain base config
-    if model_name:
-        config = get_domain_config_for_model(domain, model_name)
-    else:
-        # Fallback to base config (for backward compatibility)
-        config = DOMAIN_BASE_CONFIG[domain].copy()
-        # If table_name not provided and no model_name, we can't proceed
-        if table_name is None:
-            raise ValueError("Either table_name or model_name must be provided")
-
-    # Use domain defaults if not overridden
-    if table_name is None:
-        table_name = config['criteria_table']
-    if exclude_types is None:
-        exclude_types = config.get('exclude_types', [])
-
-    criterion_type_column = config['criterion_type_column']
-    description_column = config.get('description_column', 'Description')  # All tables use "Description"
+    criteria_config = resolve_criteria_config(domain, table_name, exclude_types, model_name)
+    table_name = criteria_config['table_name']
 
     # OPTIMIZED: Query only rows for this specific task (not entire table!)
     try:
@@ -189,49 +287,72 @@ def get_test_case(task_id, table_name=None, exclude_types=None, domain='Shopping
         if not rows:
             raise ValueError(f"Task ID {task_id} not found in Supabase {table_name} table")
 
-        print(f"🔍 Debug: Retrieved {len(rows)} rows for Task {task_id} from {table_name}")
+        logger.debug(f"Retrieved {len(rows)} rows for Task {task_id} from {table_name}")
 
-        # Extract prompt (use Specified Prompt if available, fallback to Prompt)
-        prompt = rows[0].get('Specified Prompt') or rows[0]['Prompt']
-        prompt = prompt.strip()
+        return build_test_case(
+            task_id,
+            rows,
+            domain,
+            criteria_config['exclude_types'],
+            criteria_config['criterion_type_column'],
+            criteria_config['description_column']
+        )
 
-        # Build criteria list
-        criteria = []
-        for row in rows:
-            criterion_type_raw = row.get(criterion_type_column)
-
-            # Skip rows with NULL criterion type
-            if criterion_type_raw is None:
-                continue
+    except Exception as e:
+        logger.error(f"Error reading from Supabase table: {e}")
+        raise ValueError(f"Task ID {task_id} not found in Supabase {table_name} table")
 
-            criterion_type = criterion_type_raw.strip()
 
-            # Skip excluded criterion types
-            if criterion_type in exclude_types:
-                continue
+def get_test_cases(task_ids, table_name=None, exclude_types=None, domain='Shopping', model_name=None):
+    """
+    Get test cases for many task IDs with batched IN (...) queries
 
-            # Add criterion with hurdle tag
-            hurdle_tag = row.get('Hurdle Tag', 'Not')
-            criteria.append({
-                'criterion_id': int(row['Criterion ID']),
-                'id': len(criteria) + 1,
-                'description': row[description_column].strip(),  # Use domain-specific column name
-                'type': criterion_type,
-                'hurdle_tag': hurdle_tag,
-                'grounded_status': row['Criterion Grounding Check']  # Read from database column
-            })
+    Fetches the criteria for up to TASK_ID_BATCH_SIZE tasks per query and
+    groups them in memory, instead of one query per task.
 
-        return {
-            'task_id': task_id,
-            'test_id': f"task_{task_id}",
-            'prompt': prompt,
-            'criteria': criteria,
-            'domain': domain
-        }
+    Args:
+        task_ids: Task IDs to retrieve
+        table_name: Override domain's default ACE table
+        exclude_types: Override domain's default exclusions
+        domain: Domain name ('Shopping', 'Food', 'Gaming', 'DIY') - default: 'Shopping'
+        model_name: Model name (required if table_name not provided, e.g. 'gemini-2.5-flash')
 
-    except Exception as e:
-        print(f"❌ Error reading from Supabase table: {e}")
-        raise ValueError(f"Task ID {task_id} not found in Supabase {table_name} table")
+    Returns:
+        dict: {task_id: test_case} - tasks with no criteria rows are omitted
+    """
+    if supabase is None:
+        raise ValueError("Supabase is not available")
+
+    criteria_config = resolve_criteria_config(domain, table_name, exclude_types, model_name)
+    table_name = criteria_config['table_name']
+
+    task_ids = list(task_ids)
+    rows_by_task = defaultdict(list)
+
+    for start in range(0, len(task_ids), TASK_ID_BATCH_SIZE):
+        batch = task_ids[start:start + TASK_ID_BATCH_SIZE]
+        pages = iter_keyset_pages(
+            lambda: supabase.table(table_name).select('*').in_('"Task ID"', batch),
+            'Criterion ID'
+        )
+
+        for page_rows in pages:
+            for row in page_rows:
+                rows_by_task[int(row['Task ID'])].append(row)
+
+    logger.debug(f"Retrieved criteria for {len(rows_by_task)}/{len(task_ids)} tasks from {table_name}")
+
+    return {
+        task_id: build_test_case(
+            task_id,
+            rows,
+            domain,
+            criteria_config['exclude_types'],
+            criteria_config['criterion_type_column'],
+            criteria_config['description_column']
+        )
+        for task_id, rows in rows_by_task.items()
+    }
 
 
 def get_task_ids(table_name='ACE TEST', limit=None, domain='Shopping', model_name=None):
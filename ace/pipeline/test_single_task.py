@@ -46,10 +46,10 @@ Examples:
         from configs.config import config
         from configs.domain_config import get_domain_config_for_model
         try:
-            from supabase import create_client
+            from configs.supabase_client import get_supabase_client
             if config.has_supabase():
                 runner.USE_SUPABASE = True
-                runner.supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+                runner.supabase = get_supabase_client()
                 print("--supabase flag: Enabling Supabase")
                 
                 # Validate Supabase connection and data
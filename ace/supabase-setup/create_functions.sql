@@ -0,0 +1,21 @@
+-- ============================================================
+-- CREATE HELPER FUNCTIONS FOR ACE EVALUATION BENCHMARK
+-- ============================================================
+-- This script creates Postgres functions called via Supabase RPC.
+-- Safe to re-run (uses CREATE OR REPLACE).
+-- ============================================================
+
+-- Return one row per task in a criteria table.
+-- Used by pipeline/runner.py so the DISTINCT happens in Postgres instead of
+-- transferring every criteria row and deduplicating in Python.
+CREATE OR REPLACE FUNCTION get_distinct_task_ids(criteria_table TEXT)
+RETURNS TABLE ("Task ID" INTEGER)
+LANGUAGE plpgsql
+STABLE
+AS $$
+BEGIN
+    RETURN QUERY EXECUTE format(
+        'SELECT DISTINCT "Task ID" FROM %I WHERE "Task ID" IS NOT NULL ORDER BY "Task ID"',
+        criteria_table
+    );
+END $$;
@@ -0,0 +1,47 @@
+-- ============================================================
+-- CREATE INDEXES FOR ALL ACE CRITERIA TABLES
+-- ============================================================
+-- This script adds a ("Task ID", "Criterion ID") index to every criteria
+-- table. It serves the pipeline's per-task lookups (WHERE "Task ID" = ...
+-- and "Task ID" IN (...) ORDER BY "Criterion ID") and lets
+-- get_distinct_task_ids() run as an index-only scan instead of reading
+-- every criteria row.
+--
+-- create_tables.sql already creates this index for new tables; run this
+-- script once for tables created before it was added.
+-- Safe to re-run (uses IF NOT EXISTS).
+-- Verify with: EXPLAIN (ANALYZE, BUFFERS) SELECT DISTINCT "Task ID" FROM "<criteria table>";
+-- Total: 10 models × 4 domains = 40 indexes
+-- ============================================================
+
+DO $$
+DECLARE
+    model_name TEXT;
+    domain_name TEXT;
+    table_name TEXT;
+BEGIN
+    -- List of all models
+    FOREACH model_name IN ARRAY ARRAY[
+        'gemini-2.5-pro', 'gemini-2.5-flash', 'gemini-3-pro',
+        'gpt-5', 'gpt-5.1', 'o3', 'o3-pro',
+        'sonnet-4.5', 'opus-4.1', 'opus-4.5'
+    ]
+    LOOP
+        -- List of all domains
+        FOREACH domain_name IN ARRAY ARRAY['shopping', 'food', 'gaming', 'diy']
+        LOOP
+            table_name := 'criteria_' || domain_name || '_' || model_name;
+
+            -- CONCURRENTLY is not allowed inside a DO block; these tables are small
+            -- enough that a regular build only locks writes briefly
+            EXECUTE format(
+                'CREATE INDEX IF NOT EXISTS %I ON %I ("Task ID", "Criterion ID")',
+                'idx_' || table_name || '_task_id', table_name
+            );
+            RAISE NOTICE 'Indexed table: %', table_name;
+
+        END LOOP;
+    END LOOP;
+
+    RAISE NOTICE 'Successfully created indexes on all 40 criteria tables!';
+END $$;
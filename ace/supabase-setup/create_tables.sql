@@ -114,6 +114,12 @@ BEGIN
             EXECUTE sql_statement;
             RAISE NOTICE 'Created table: %', table_name;
             
+            -- Index per-task lookups and DISTINCT "Task ID" scans
+            EXECUTE format(
+                'CREATE INDEX %I ON %I ("Task ID", "Criterion ID")',
+                'idx_' || table_name || '_task_id', table_name
+            );
+            
         END LOOP;
     END LOOP;
     
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Unit tests for pipeline/init_from_dataset.py"""
+
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'pipeline'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'configs'))
+
+import init_from_dataset
+from init_from_dataset import insert_criteria_to_table, write_rows_in_batches
+
+
+def make_criterion(criterion_id, task_id='1'):
+    return {
+        'Criterion ID': criterion_id,
+        'Task ID': task_id,
+        'Prompt': 'prompt',
+        'Description': 'description',
+    }
+
+
+class TestInsertCriteriaToTable:
+    def test_bad_criterion_id_counts_as_error(self):
+        """An unparsable Criterion ID is skipped; the other rows are still inserted"""
+        client = MagicMock()
+        client.table.return_value.select.return_value.in_.return_value.execute.return_value.data = []
+        criteria = [make_criterion('1'), make_criterion(''), make_criterion('3')]
+
+        with patch.object(init_from_dataset, 'supabase', client):
+            inserted = insert_criteria_to_table(criteria, 'Food', 'criteria_table')
+
+        assert inserted == 2
+        checked_ids = client.table.return_value.select.return_value.in_.call_args[0][1]
+        assert sorted(checked_ids) == [1, 3]
+        written = client.table.return_value.insert.call_args[0][0]
+        assert [row['Criterion ID'] for row in written] == [1, 3]
+
+    def test_skips_existing_criteria(self):
+        """Criteria already in the table are not written again"""
+        client = MagicMock()
+        client.table.return_value.select.return_value.in_.return_value.execute.return_value.data = [
+            {'Criterion ID': 1},
+        ]
+        criteria = [make_criterion('1'), make_criterion('2')]
+
+        with patch.object(init_from_dataset, 'supabase', client):
+            inserted = insert_criteria_to_table(criteria, 'Food', 'criteria_table')
+
+        assert inserted == 1
+        written = client.table.return_value.insert.call_args[0][0]
+        assert [row['Criterion ID'] for row in written] == [2]
+
+
+class TestWriteRowsInBatches:
+    def test_writes_all_rows_in_batches(self):
+        """Rows are sent WRITE_BATCH_SIZE at a time"""
+        client = MagicMock()
+        rows = [{'Task ID': i} for i in range(5)]
+
+        with patch.object(init_from_dataset, 'supabase', client), \
+             patch.object(init_from_dataset, 'WRITE_BATCH_SIZE', 2):
+            result = write_rows_in_batches('task_table', rows, 'Task ID')
+
+        assert result == (5, 0)
+        batches = [call[0][0] for call in client.table.return_value.insert.call_args_list]
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        """A failed batch is retried per row; only the bad row counts as an error"""
+        client = MagicMock()
+        rows = [{'Task ID': i} for i in range(4)]
+
+        def insert(payload):
+            query = MagicMock()
+            if isinstance(payload, list) or payload['Task ID'] == 2:
+                query.execute.side_effect = Exception("bad row")
+            return query
+
+        client.table.return_value.insert.side_effect = insert
+
+        with patch.object(init_from_dataset, 'supabase', client):
+            result = write_rows_in_batches('task_table', rows, 'Task ID')
+
+        assert result == (len(rows) - 1, 1)
+
+    def test_overwrite_uses_upsert(self):
+        """overwrite=True upserts on the ID column"""
+        client = MagicMock()
+        rows = [{'Task ID': 1}]
+
+        with patch.object(init_from_dataset, 'supabase', client):
+            write_rows_in_batches('task_table', rows, 'Task ID', overwrite=True)
+
+        client.table.return_value.upsert.assert_called_once_with(rows, on_conflict='Task ID')
+        client.table.return_value.insert.assert_not_called()
@@ -16,7 +16,11 @@ from runner import (
     determine_failure_step,
     retry_with_backoff,
     build_common_task_data,
+    get_all_task_ids,
 )
+import runner
+import supabase_reader
+from test_supabase_reader import FakeQuery
 
 
 class TestDeduplicateUrls:
@@ -262,3 +266,74 @@ class TestBuildCommonTaskData:
         result = build_common_task_data(scraped_data, [], [], ' - 1')
 
         assert 'Shop vs. Product' not in result
+
+
+class TestGetAllTaskIds:
+    def test_uses_rpc_when_available(self):
+        """Task IDs come from the get_distinct_task_ids RPC"""
+        calls = []
+        client = MagicMock()
+        client.rpc.side_effect = lambda name, params: FakeQuery([{'Task ID': 3}, {'Task ID': 1}], calls)
+
+        with patch.object(runner, 'supabase', client):
+            result = get_all_task_ids('criteria_table')
+
+        assert result == [1, 3]
+        client.rpc.assert_called_with('get_distinct_task_ids', {'criteria_table': 'criteria_table'})
+        client.table.assert_not_called()
+
+    def test_pages_rpc_results(self):
+        """RPC results past the row limit are fetched page by page"""
+        calls = []
+        client = MagicMock()
+        client.rpc.side_effect = lambda name, params: FakeQuery([{'Task ID': i} for i in range(1, 6)], calls)
+
+        with patch.object(runner, 'supabase', client), \
+             patch.object(supabase_reader, 'SUPABASE_PAGE_SIZE', 2):
+            result = get_all_task_ids('criteria_table')
+
+        assert result == [1, 2, 3, 4, 5]
+        assert len(calls) == 3
+
+    def test_falls_back_to_scan_when_rpc_fails(self):
+        """Falls back to paging criteria rows if the RPC is not installed"""
+        calls = []
+        client = MagicMock()
+        client.rpc.side_effect = Exception("function get_distinct_task_ids does not exist")
+        rows = [{'Task ID': 2}, {'Task ID': 1}, {'Task ID': 2}]
+        client.table.side_effect = lambda name: FakeQuery(rows, calls)
+
+        with patch.object(runner, 'supabase', client):
+            result = get_all_task_ids('criteria_table')
+
+        assert result == [1, 2]
+        client.table.assert_called_with('criteria_table')
+
+    def test_scan_stops_at_null_task_ids(self):
+        """Criteria rows with a NULL Task ID at the end of a full page are skipped, not re-paged"""
+        calls = []
+        client = MagicMock()
+        client.rpc.side_effect = Exception("RPC unavailable")
+        rows = [{'Task ID': 1}, {'Task ID': 2}, {'Task ID': None}, {'Task ID': None}, {'Task ID': None}]
+        client.table.side_effect = lambda name: FakeQuery(rows, calls)
+
+        with patch.object(runner, 'supabase', client), \
+             patch.object(supabase_reader, 'SUPABASE_PAGE_SIZE', 3):
+            result = get_all_task_ids('criteria_table')
+
+        assert result == [1, 2]
+
+    def test_scan_handles_task_spanning_page_boundary(self):
+        """A task whose criteria rows span two pages is returned once, and no task is skipped"""
+        calls = []
+        client = MagicMock()
+        client.rpc.side_effect = Exception("RPC unavailable")
+        # Page size 3: the first page ends partway through task 2's rows
+        rows = [{'Task ID': 1}, {'Task ID': 2}, {'Task ID': 2}, {'Task ID': 2}, {'Task ID': 3}, {'Task ID': 4}]
+        client.table.side_effect = lambda name: FakeQuery(rows, calls)
+
+        with patch.object(runner, 'supabase', client), \
+             patch.object(supabase_reader, 'SUPABASE_PAGE_SIZE', 3):
+            result = get_all_task_ids('criteria_table')
+
+        assert result == [1, 2, 3, 4]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Unit tests for pipeline/supabase_reader.py"""
+
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'pipeline'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'configs'))
+
+import pytest
+import supabase_reader
+from supabase_reader import get_test_cases
+
+
+class FakeQuery:
+    """Minimal PostgREST query builder over an in-memory list of rows"""
+
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+        self.filters = []
+        self.negate_next = False
+        self.order_column = None
+        self.page_size = None
+
+    def select(self, *args):
+        return self
+
+    @property
+    def not_(self):
+        self.negate_next = True
+        return self
+
+    def is_(self, column, value):
+        assert value == 'null'
+        negate, self.negate_next = self.negate_next, False
+        self.filters.append(lambda row: (row[column.strip('"')] is None) != negate)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row[column.strip('"')] in values)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column.strip('"')] > value)
+        return self
+
+    def order(self, column):
+        self.order_column = column
+        return self
+
+    def limit(self, page_size):
+        self.page_size = page_size
+        return self
+
+    def execute(self):
+        self.calls.append(self)
+        if len(self.calls) > 100:
+            raise RuntimeError("Pagination did not terminate")
+        rows = [row for row in self.rows if all(f(row) for f in self.filters)]
+        # Postgres sorts NULLs last
+        rows.sort(key=lambda row: (row[self.order_column] is None, row[self.order_column] or 0))
+        return MagicMock(data=rows[:self.page_size])
+
+
+class TestIterKeysetPages:
+    def test_pages_until_short_page(self):
+        """Pages start after the last key and stop at the first short page"""
+        calls = []
+        rows = [{'Criterion ID': i} for i in range(5, 0, -1)]
+
+        pages = list(supabase_reader.iter_keyset_pages(lambda: FakeQuery(rows, calls), 'Criterion ID', page_size=2))
+
+        assert [[row['Criterion ID'] for row in page] for page in pages] == [[1, 2], [3, 4], [5]]
+        assert len(calls) == 3
+
+    def test_skips_null_keys(self):
+        """NULL keys at the end of a full page don't restart the scan"""
+        calls = []
+        rows = [{'Task ID': 1}, {'Task ID': 2}, {'Task ID': None}, {'Task ID': None}]
+
+        pages = list(supabase_reader.iter_keyset_pages(lambda: FakeQuery(rows, calls), 'Task ID', page_size=2))
+
+        assert [[row['Task ID'] for row in page] for page in pages] == [[1, 2]]
+
+
+def make_criteria_row(criterion_id, task_id):
+    return {
+        'Criterion ID': criterion_id,
+        'Task ID': task_id,
+        'Prompt': f'prompt {task_id}',
+        'Description': f'criterion {criterion_id}',
+        'Criteria type': 'Other',
+        'Criterion Grounding Check': 'Grounded',
+    }
+
+
+class TestGetTestCases:
+    def test_groups_rows_by_task(self):
+        """Criteria rows are grouped into one test case per task"""
+        calls = []
+        rows = [make_criteria_row(1, 10), make_criteria_row(2, 20), make_criteria_row(3, 10)]
+        client = MagicMock()
+        client.table.side_effect = lambda name: FakeQuery(rows, calls)
+
+        with patch.object(supabase_reader, 'supabase', client):
+            result = get_test_cases([10, 20], table_name='criteria_table', domain='Shopping')
+
+        assert sorted(result) == [10, 20]
+        assert [c['criterion_id'] for c in result[10]['criteria']] == [1, 3]
+        assert result[20]['prompt'] == 'prompt 20'
+
+    def test_omits_tasks_without_rows(self):
+        """Tasks with no criteria rows are left out of the result"""
+        calls = []
+        rows = [make_criteria_row(1, 10)]
+        client = MagicMock()
+        client.table.side_effect = lambda name: FakeQuery(rows, calls)
+
+        with patch.object(supabase_reader, 'supabase', client):
+            result = get_test_cases([10, 99], table_name='criteria_table', domain='Shopping')
+
+        assert list(result) == [10]
+
+    def test_splits_task_batches_and_pages(self):
+        """Task IDs are sent in batches and each batch is paged by Criterion ID"""
+        calls = []
+        rows = [make_criteria_row(criterion_id, task_id)
+                for criterion_id, task_id in enumerate([1, 1, 1, 2, 3, 3], start=1)]
+        client = MagicMock()
+        client.table.side_effect = lambda name: FakeQuery(rows, calls)
+
+        with patch.object(supabase_reader, 'supabase', client), \
+             patch.object(supabase_reader, 'TASK_ID_BATCH_SIZE', 2), \
+             patch.object(supabase_reader, 'SUPABASE_PAGE_SIZE', 2):
+            result = get_test_cases([1, 2, 3], table_name='criteria_table', domain='Shopping')
+
+        assert [len(result[task_id]['criteria']) for task_id in (1, 2, 3)] == [3, 1, 2]
+        # Batch [1, 2] has 4 rows: two full pages, then an empty one; batch [3] fills one page, then an empty one
+        assert len(calls) == 5
+
+    def test_raises_without_supabase(self):
+        """Raises when Supabase is not configured"""
+        with patch.object(supabase_reader, 'supabase', None):
+            with pytest.raises(ValueError):
+                get_test_cases([1], table_name='criteria_table', domain='Shopping')
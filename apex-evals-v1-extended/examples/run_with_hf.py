@@ -1,17 +1,27 @@
 import argparse
 import asyncio
 import csv
+import itertools
 import json
 import logging
 import os
+import re
 import statistics
 import sys
+from functools import lru_cache
 from pathlib import Path
 
+from call_llm import LiteLLMClient
 from dotenv import load_dotenv
 from generation import Attachment, GenerationTask, ModelConfig, run_generation_task_async
 from grading import GradingModelConfig, GradingTask, run_grading_task_async
 
+# orjson is a much faster C JSON codec for large rubrics; fall back to stdlib json if missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -20,6 +30,7 @@ logger = logging.getLogger(__name__)
 # === CONFIGURATION ===
 
 PROMPT_TEMPLATE = Path("prompt/response_generation_prompt.txt").read_text(encoding="utf-8")
+PROMPT_PLACEHOLDER = re.compile(r"\{\{(Domain|Prompt)\}\}")
 
 MODELS = [
     {"model_id": "gpt-5", "model_configs": {"reasoning_effort": "high" , "verbosity" : "medium"}, "max_tokens": 128000, "max_input_tokens": 272000},
@@ -40,6 +51,7 @@ GRADING_MODEL = "gemini-2.5-flash"
 GRADING_MAX_TOKENS = 65535
 NUMBER_OF_RUNS = 1
 VALID_DOMAINS = ["Consulting", "Finance", "Legal", "Medicine"]
+MAX_CALLS_PER_PROVIDER = 8  # In-flight generation/grading calls per provider, across all tasks
 
 
 # === HELPERS ===
@@ -48,29 +60,73 @@ def sanitize(name: str) -> str:
     return name.replace("-", "_").replace(".", "_").replace("/", "_")
 
 
-def get_model_keys() -> list[str]:
-    return [sanitize(m["model_id"]) for m in MODELS]
+def json_loads(text: str):
+    return orjson.loads(text) if orjson else json.loads(text)
+
+
+def json_dumps(obj) -> str:
+    # Same output either way: compact separators, non-ASCII left unescaped
+    if orjson:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def format_prompt(domain: str, task_prompt: str) -> str:
+    """Fill PROMPT_TEMPLATE in a single pass over the template."""
+    values = {"Domain": domain, "Prompt": task_prompt}
+    return PROMPT_PLACEHOLDER.sub(lambda m: values[m.group(1)], PROMPT_TEMPLATE)
+
+
+# Sanitized column prefix per model, computed once instead of per task/run
+MODEL_KEYS = {m["model_id"]: sanitize(m["model_id"]) for m in MODELS}
+
+_provider_semaphores: dict[str, asyncio.Semaphore] = {}
+
 
+def provider_semaphore(model_id: str) -> asyncio.Semaphore:
+    """Shared semaphore capping concurrent calls to the provider serving model_id."""
+    provider = next(
+        (p.value for prefix, p in LiteLLMClient.PROVIDER_MAPPINGS.items() if model_id.startswith(prefix)),
+        "custom",
+    )
+    if provider not in _provider_semaphores:
+        _provider_semaphores[provider] = asyncio.Semaphore(MAX_CALLS_PER_PROVIDER)
+    return _provider_semaphores[provider]
 
-def get_csv_headers() -> list[str]:
+
+def get_csv_headers(include_autoratings: bool = True) -> list[str]:
     headers = ["task_id", "domain", "status"]
-    for model_key in get_model_keys():
+    for model_key in MODEL_KEYS.values():
         for run in range(1, NUMBER_OF_RUNS + 1):
-            headers.extend([f"{model_key}_{run}_response", f"{model_key}_{run}_score", f"{model_key}_{run}_score_summary"])
+            headers.extend([f"{model_key}_{run}_response", f"{model_key}_{run}_score"])
+            if include_autoratings:
+                headers.append(f"{model_key}_{run}_autoratings")
     return headers
 
 
+CSV_HEADERS = get_csv_headers()
+
+
+def to_csv_row(result: dict, headers: list[str] = CSV_HEADERS) -> list:
+    """Order a result dict by headers (missing columns are left empty)."""
+    return [result.get(header, "") for header in headers]
+
+
+@lru_cache(maxsize=8192)
+def resolve_attachment_path(rel_path: str, base_dir: str) -> tuple[str, bool]:
+    """Return (absolute path, exists). Cached since many tasks reference the same files."""
+    full_path = os.path.join(base_dir, rel_path)
+    return os.path.abspath(full_path), os.path.exists(full_path)
+
+
 def create_attachments(file_attachments_str: str, base_dir: str) -> list[Attachment]:
     attachments = []
-    for rel_path in file_attachments_str.strip().split("\n"):
-        rel_path = rel_path.strip()
-        if not rel_path:
-            continue
-        full_path = os.path.join(base_dir, rel_path)
-        if os.path.exists(full_path):
-            attachments.append(Attachment(filename=os.path.basename(full_path), url=f"file://{os.path.abspath(full_path)}"))
+    for rel_path in filter(None, map(str.strip, file_attachments_str.splitlines())):
+        abs_path, exists = resolve_attachment_path(rel_path, base_dir)
+        if exists:
+            attachments.append(Attachment(filename=os.path.basename(abs_path), url=f"file://{abs_path}"))
         else:
-            logger.warning(f"File not found: {full_path}")
+            logger.warning(f"File not found: {os.path.join(base_dir, rel_path)}")
     return attachments
 
 
@@ -80,19 +136,20 @@ def load_completed_tasks(output_file: str) -> set[str]:
         return set()
     completed = set()
     with open(output_file, "r", encoding="utf-8") as f:
-        for row in csv.DictReader(f):
-            if row.get("status") == "completed":
-                completed.add(row.get("task_id", ""))
+        # Plain csv.reader: only two columns are needed, so skip building a dict of every
+        # (potentially huge) response/autoratings field per row
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if "task_id" not in header or "status" not in header:
+            return completed
+        id_idx, status_idx = header.index("task_id"), header.index("status")
+        min_len = max(id_idx, status_idx) + 1
+        for row in reader:
+            if len(row) >= min_len and row[status_idx] == "completed":
+                completed.add(row[id_idx])
     return completed
 
 
-def save_result(output_file: str, headers: list[str], result: dict):
-    """Append a single result row to CSV."""
-    with open(output_file, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=headers, extrasaction="ignore")
-        writer.writerow(result)
-
-
 # === GENERATION & GRADING ===
 
 async def generate(prompt: str, model_cfg: dict, attachments: list) -> dict:
@@ -121,8 +178,15 @@ async def generate(prompt: str, model_cfg: dict, attachments: list) -> dict:
         return {"success": False, "response": "", "error": str(e)}
 
 
-async def grade(response: str, rubric_json: str) -> dict:
-    rubric_dict = json.loads(rubric_json)
+async def grade(response: str, rubric_json: str, rubric: dict, include_autoratings: bool = True) -> dict:
+    """
+    Grade a response against the rubric.
+
+    autoratings holds only the per-criterion grading overlay
+    ({criterion_key: {"autorating", "reason"}}); merge it into the task's
+    Rubric JSON (rubric[key].update(autoratings[key])) to get the full
+    annotated rubric. It is None when include_autoratings is False.
+    """
     config = GradingModelConfig(model_id=GRADING_MODEL, max_tokens=GRADING_MAX_TOKENS, temperature=0.01)
     grading_task = GradingTask(solution=response, rubric=rubric_json, grading_model=config)
     result = await run_grading_task_async(grading_task)
@@ -130,18 +194,21 @@ async def grade(response: str, rubric_json: str) -> dict:
     if not result.criteria_results:
         raise ValueError("Grading returned no results")
 
+    if not include_autoratings:
+        return {"score": result.percentage_score, "autoratings": None}
+
+    autoratings = {}
     for cr in result.criteria_results:
         key = cr.get("criterion_key")
-        if key in rubric_dict and isinstance(rubric_dict[key], dict):
-            rubric_dict[key]["autorating"] = bool(cr.get("autorating"))
-            rubric_dict[key]["reason"] = cr.get("reason", "")
+        if key in rubric and isinstance(rubric[key], dict):
+            autoratings[key] = {"autorating": bool(cr.get("autorating")), "reason": cr.get("reason", "")}
 
-    return {"score": result.percentage_score, "score_summary": json.dumps(rubric_dict, ensure_ascii=False)}
+    return {"score": result.percentage_score, "autoratings": json_dumps(autoratings)}
 
 
 # === TASK PROCESSING ===
 
-async def process_task(task_data: dict, base_dir: str) -> dict | None:
+async def process_task(task_data: dict, base_dir: str, include_autoratings: bool = True) -> dict | None:
     """Process a task. Returns None if any grading fails (task will be skipped)."""
     task_id = task_data.get("Task ID", "unknown")
     domain = task_data.get("Domain", "")
@@ -152,36 +219,66 @@ async def process_task(task_data: dict, base_dir: str) -> dict | None:
     try:
         attachments = create_attachments(task_data.get("File Attachments", ""), base_dir)
         rubric_json = task_data.get("Rubric JSON", "").strip()
-        prompt = PROMPT_TEMPLATE.replace("{{Domain}}", domain).replace("{{Prompt}}", task_data.get("Prompt", ""))
+        prompt = format_prompt(domain, task_data.get("Prompt", ""))
 
-        for model_cfg in MODELS:
-            model_key = sanitize(model_cfg["model_id"])
-
-            for run in range(1, NUMBER_OF_RUNS + 1):
-                prefix = f"{model_key}_{run}"
-
-                # Generate
-                gen = await generate(prompt, model_cfg, attachments)
-                if not gen.get("success"):
-                    error_msg = gen.get("error", "Unknown error")
-                    logger.error(f"  {prefix}: Generation failed - {error_msg}")
-                    return None
+        if not rubric_json:
+            logger.error(f"  [{task_id}] No rubric - skipping task")
+            return None
 
-                result[f"{prefix}_response"] = gen["response"]
+        # Parse once per task; every model run grades against the same rubric
+        rubric = json_loads(rubric_json)
 
-                # Grade
-                if not rubric_json or not gen["response"]:
-                    logger.error(f"  {prefix}: No rubric or empty response - skipping task")
-                    return None
+        async def run_model(model_cfg: dict, run: int) -> dict | None:
+            """Generate and grade one model run. Returns its result columns, or None on failure."""
+            prefix = f"{MODEL_KEYS[model_cfg['model_id']]}_{run}"
 
-                try:
-                    g = await grade(gen["response"], rubric_json)
-                    result[f"{prefix}_score"] = g["score"]
-                    result[f"{prefix}_score_summary"] = g["score_summary"]
-                    logger.info(f"  {prefix}: {g['score']:.1f}%")
-                except Exception as e:
-                    logger.error(f"  {prefix}: Grading failed ({e}) - skipping task")
-                    return None
+            # Generate
+            async with provider_semaphore(model_cfg["model_id"]):
+                gen = await generate(prompt, model_cfg, attachments)
+            if not gen.get("success"):
+                error_msg = gen.get("error", "Unknown error")
+                logger.error(f"  [{task_id}] {prefix}: Generation failed - {error_msg}")
+                return None
+
+            # Grade
+            if not gen["response"]:
+                logger.error(f"  [{task_id}] {prefix}: Empty response - skipping task")
+                return None
+
+            try:
+                async with provider_semaphore(GRADING_MODEL):
+                    g = await grade(gen["response"], rubric_json, rubric, include_autoratings)
+            except Exception as e:
+                logger.error(f"  [{task_id}] {prefix}: Grading failed ({e}) - skipping task")
+                return None
+
+            logger.info(f"  [{task_id}] {prefix}: {g['score']:.1f}%")
+            model_result = {f"{prefix}_response": gen["response"], f"{prefix}_score": g["score"]}
+            if include_autoratings:
+                model_result[f"{prefix}_autoratings"] = g["autoratings"]
+            return model_result
+
+        # Every (model, run) pair is independent, so run them all concurrently.
+        # The first failure discards the task, so cancel the rest instead of paying for them.
+        runs = [
+            asyncio.ensure_future(run_model(model_cfg, run))
+            for model_cfg in MODELS
+            for run in range(1, NUMBER_OF_RUNS + 1)
+        ]
+        pending = set(runs)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    model_result = finished.result()
+                    if model_result is None:
+                        return None
+                    result.update(model_result)
+        finally:
+            for unfinished in pending:
+                unfinished.cancel()
+            # Wait for cancellations and collect any other runs' errors so none go unretrieved
+            await asyncio.gather(*runs, return_exceptions=True)
 
         result["status"] = "completed"
         return result
@@ -204,7 +301,7 @@ def calculate_stats(output_file: str):
     if not rows:
         return
 
-    model_keys = get_model_keys()
+    model_keys = list(MODEL_KEYS.values())
 
     # Collect scores: {model: {domain: [median_per_task, ...]}}
     domain_scores = {mk: {} for mk in model_keys}
@@ -261,6 +358,8 @@ async def main():
     parser.add_argument("--start_index", type=int, default=0)
     parser.add_argument("--limit", type=int, default=None)
     parser.add_argument("--domain", type=str, nargs="+", choices=VALID_DOMAINS, default=None)
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of tasks to process in parallel")
+    parser.add_argument("--no_autoratings", "--no-autoratings", action="store_true", help="Omit the per-criterion *_autoratings columns")
     args = parser.parse_args()
 
     # Load tasks
@@ -269,17 +368,18 @@ async def main():
         logger.error(f"Input CSV not found: {csv_path}")
         sys.exit(1)
 
+    # Stream rows so only the selected start/limit window is held in memory
+    end_idx = None if args.limit is None else args.start_index + args.limit
     with open(csv_path, "r", encoding="utf-8") as f:
-        tasks = list(csv.DictReader(f))
+        rows = csv.DictReader(f)
 
-    # Filter by domain
-    if args.domain:
-        tasks = [t for t in tasks if t.get("Domain", "") in args.domain]
-        logger.info(f"Filtered to domains: {', '.join(args.domain)}")
+        # Filter by domain
+        if args.domain:
+            rows = (t for t in rows if t.get("Domain", "") in args.domain)
+            logger.info(f"Filtered to domains: {', '.join(args.domain)}")
 
-    # Apply start/limit
-    end_idx = len(tasks) if args.limit is None else args.start_index + args.limit
-    tasks = tasks[args.start_index:end_idx]
+        # Apply start/limit
+        tasks = list(itertools.islice(rows, args.start_index, end_idx))
 
     # Load completed tasks to skip
     completed = load_completed_tasks(args.output)
@@ -287,24 +387,49 @@ async def main():
 
     logger.info(f"Tasks to process: {len(tasks)} (skipped {len(completed)} completed)")
 
-    # Initialize CSV if needed
-    headers = get_csv_headers()
-    if not os.path.exists(args.output):
-        with open(args.output, "w", newline="", encoding="utf-8") as f:
-            csv.DictWriter(f, fieldnames=headers).writeheader()
+    # An existing output file must have the same columns, or appended rows would be misaligned
+    include_autoratings = not args.no_autoratings
+    headers = CSV_HEADERS if include_autoratings else get_csv_headers(include_autoratings=False)
+    existing_headers = []
+    if os.path.exists(args.output):
+        with open(args.output, "r", newline="", encoding="utf-8") as f:
+            existing_headers = next(csv.reader(f), [])
+    if existing_headers and existing_headers != headers:
+        logger.error(
+            f"{args.output} has different columns than this run "
+            "(different MODELS, --no_autoratings setting, or an older *_score_summary results file?)"
+        )
+        sys.exit(1)
+
+    # Process tasks concurrently, saving each result as soon as its task finishes
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+    async def bounded_process_task(task_data: dict) -> tuple[str, dict | None]:
+        async with semaphore:
+            return task_data.get("Task ID", "unknown"), await process_task(task_data, args.input_dir, include_autoratings)
 
-    # Process tasks
+    write_header = not existing_headers
     saved = 0
     skipped = 0
-    for idx, task_data in enumerate(tasks):
-        logger.info(f"\n[{idx + 1}/{len(tasks)}]")
-        result = await process_task(task_data, args.input_dir)
-        if result:
-            save_result(args.output, headers, result)
-            saved += 1
-        else:
-            skipped += 1
-            logger.warning(f"Task skipped (not saved)")
+
+    # Keep one writer open for the whole run; flush every row, since each one is minutes of paid work
+    with open(args.output, "a", newline="", encoding="utf-8") as out_f:
+        writer = csv.writer(out_f)
+        if write_header:
+            writer.writerow(headers)
+            out_f.flush()
+
+        pending = [bounded_process_task(task_data) for task_data in tasks]
+        for idx, next_result in enumerate(asyncio.as_completed(pending)):
+            task_id, result = await next_result
+            logger.info(f"\n[{idx + 1}/{len(tasks)}] {task_id} finished")
+            if result:
+                writer.writerow(to_csv_row(result, headers))
+                out_f.flush()
+                saved += 1
+            else:
+                skipped += 1
+                logger.warning(f"Task {task_id} skipped (not saved)")
 
     logger.info(f"\nSaved: {saved} | Skipped: {skipped}")
 